@@ -8,19 +8,23 @@ import os
 import sys
 import time
 import json
+import re
+import base64
 import hashlib
+import hmac
 import logging
 import tempfile
 import subprocess
-import urllib.request
-import urllib.error
 import threading
 import signal
+import socket
+import heapq
+import itertools
+import mmap
 from pathlib import Path
-from cryptography.hazmat.primitives import hashes, serialization
-from cryptography.hazmat.primitives.asymmetric import rsa, padding
-from cryptography.exceptions import InvalidSignature
-
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # Import systemd watchdog support
 try:
@@ -28,7 +32,13 @@ try:
     SYSTEMD_AVAILABLE = True
 except ImportError:
     SYSTEMD_AVAILABLE = False
-    logger.warning("systemd module not available, watchdog notifications disabled")
+
+# Import version parsing support
+try:
+    from packaging.version import Version, InvalidVersion
+    PACKAGING_AVAILABLE = True
+except ImportError:
+    PACKAGING_AVAILABLE = False
 
 # Configuration
 LIGHTSCOPE_HOME = Path("/opt/lightscope")
@@ -43,6 +53,8 @@ print(f"runner_version: {runner_version}")
 
 UPDATE_CHECK_URL = "https://thelightscope.com/latest/version"
 DOWNLOAD_URL_BASE = "https://thelightscope.com/latest"
+UPDATE_CACHE_PATH = CONFIG_DIR / "update_cache.json"
+BACKUP_INDEX_PATH = UPDATES_DIR / "index.json"  # {version: [backup_path, signature_path]}
 
 # Setup logging
 logging.basicConfig(
@@ -55,10 +67,129 @@ logging.basicConfig(
 )
 logger = logging.getLogger("lightscope-runner")
 
+# Shared HTTPS session so the version check and update downloads reuse
+# keep-alive connections instead of paying a TLS handshake per request
+HTTP = requests.Session()
+HTTP.mount("https://", HTTPAdapter(
+    pool_connections=1,
+    pool_maxsize=4,
+    pool_block=False,
+    max_retries=Retry(total=3, backoff_factor=0.5)
+))
+HTTP_TIMEOUT = (10, 30)  # (connect, read) seconds
+DOWNLOAD_CHUNK_SIZE = 1 << 20  # 1 MiB
+
 # Global variables for thread coordination
 shutdown_event = threading.Event()
 update_available_event = threading.Event()
+stop_requested_event = threading.Event()  # set only by SIGTERM/SIGINT
 lightscope_process = None
+update_check_worker = None
+notify_socket = None  # persistent connection to $NOTIFY_SOCKET
+WATCHDOG_INTERVAL = 15  # seconds between systemd watchdog notifications
+UPDATE_CHECK_INTERVAL = 60 * 60  # Every hour
+
+# Matches the ls_version = "x.x.x" line in lightscope_core.py
+_LS_VERSION_RE = re.compile(rb'ls_version\s*=\s*["\']([^"\']+)["\']')
+
+def _der_read(data, offset):
+    """Read one DER TLV at offset, returning (tag, value, next_offset)"""
+    tag = data[offset]
+    length = data[offset + 1]
+    offset += 2
+    if length & 0x80:
+        num_bytes = length & 0x7f
+        length = int.from_bytes(data[offset:offset + num_bytes], 'big')
+        offset += num_bytes
+    return tag, data[offset:offset + length], offset + length
+
+def parse_rsa_public_key_pem(pem_data):
+    """Extract (n, e) from a PEM-encoded RSA public key"""
+    lines = pem_data.decode('ascii').strip().splitlines()
+    der = base64.b64decode(''.join(line for line in lines if not line.startswith('-----')))
+    
+    _, key_seq, _ = _der_read(der, 0)
+    tag, value, offset = _der_read(key_seq, 0)
+    if tag == 0x30:
+        # SubjectPublicKeyInfo: skip the AlgorithmIdentifier, unwrap the
+        # BIT STRING (leading unused-bits byte) to get the RSAPublicKey
+        _, bit_string, _ = _der_read(key_seq, offset)
+        _, key_seq, _ = _der_read(bit_string[1:], 0)
+        tag, value, offset = _der_read(key_seq, 0)
+    
+    n = int.from_bytes(value, 'big')
+    _, value, _ = _der_read(key_seq, offset)
+    e = int.from_bytes(value, 'big')
+    return n, e
+
+def _mgf1_sha256(seed, length):
+    """MGF1 mask generation function with SHA-256 (RFC 8017 B.2.1)"""
+    mask = b"".join(
+        hashlib.sha256(seed + counter.to_bytes(4, 'big')).digest()
+        for counter in range((length + 31) // 32)
+    )
+    return mask[:length]
+
+def rsa_pss_verify(public_numbers, digest, signature):
+    """Verify an RSASSA-PSS signature (SHA-256, MGF1-SHA-256) over a digest
+    
+    Pure-Python implementation of RFC 8017 8.1.2 / 9.1.2. The salt length
+    is recovered from the encoded message, so signatures made with any
+    salt length verify.
+    """
+    n, e = public_numbers
+    mod_bits = n.bit_length()
+    if len(signature) != (mod_bits + 7) // 8:
+        return False
+    
+    s = int.from_bytes(signature, 'big')
+    if s >= n:
+        return False
+    
+    em_bits = mod_bits - 1
+    em_len = (em_bits + 7) // 8
+    m = pow(s, e, n)
+    if m.bit_length() > em_bits:
+        return False
+    em = m.to_bytes(em_len, 'big')
+    
+    h_len = len(digest)
+    if em_len < h_len + 2 or em[-1] != 0xbc:
+        return False
+    
+    masked_db = em[:em_len - h_len - 1]
+    h = em[em_len - h_len - 1:-1]
+    zero_bits = 8 * em_len - em_bits
+    if masked_db[0] >> (8 - zero_bits):
+        return False
+    
+    db_mask = _mgf1_sha256(h, len(masked_db))
+    db = (int.from_bytes(masked_db, 'big') ^ int.from_bytes(db_mask, 'big')).to_bytes(len(masked_db), 'big')
+    db = bytes([db[0] & (0xff >> zero_bits)]) + db[1:]
+    
+    # DB = PS (zero bytes) || 0x01 || salt
+    separator = len(db) - len(db.lstrip(b"\x00"))
+    if separator == len(db) or db[separator] != 0x01:
+        return False
+    salt = db[separator + 1:]
+    
+    expected = hashlib.sha256(b"\x00" * 8 + digest + salt).digest()
+    return hmac.compare_digest(h, expected)
+
+def is_newer_version(latest, current):
+    """Return True if version string latest is strictly newer than current"""
+    if not current:
+        return True
+    if PACKAGING_AVAILABLE:
+        try:
+            return Version(latest) > Version(current)
+        except InvalidVersion:
+            pass
+    try:
+        # Plain dotted numeric versions, e.g. "1.10.0" > "1.9.0"
+        return tuple(int(part) for part in latest.split('.')) > tuple(int(part) for part in current.split('.'))
+    except ValueError:
+        return latest != current
 
 class SecureUpdater:
     """Handles secure downloading and verification of LightScope updates"""
@@ -66,30 +197,45 @@ class SecureUpdater:
     def __init__(self):
         self.public_key = None
         self.current_version = None
+        self.latest_version = None
+        # Validators from the last version check, used for conditional requests
+        self._etag = None
+        self._last_modified = None
+        self._cached_version = None
         self.load_current_version()
         self.load_public_key()
+        self.load_update_cache()
     
     def load_current_version(self):
         """Load current version from lightscope_core.py"""
         try:
             core_path = BIN_DIR / "lightscope_core.py"
             if core_path.exists():
-                with open(core_path, 'r') as f:
-                    content = f.read()
-                    # Extract version from ls_version = "x.x.x" line
-                    import re
-                    match = re.search(r'ls_version\s*=\s*["\']([^"\']+)["\']', content)
-                    if match:
-                        self.current_version = match.group(1)
-                        logger.info(f"Current version: {self.current_version} (from {core_path})")
-                        # Additional debug info
+                # Search the memory-mapped file for the ls_version = "x.x.x"
+                # line, so only the pages up to the match are read
+                version = None
+                with open(core_path, 'rb') as f:
+                    # mmap cannot map an empty file
+                    if os.fstat(f.fileno()).st_size:
+                        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                            match = _LS_VERSION_RE.search(mm)
+                            if match:
+                                version = match.group(1).decode()
+                
+                if version:
+                    self.current_version = version
+                    logger.info(f"Current version: {self.current_version} (from {core_path})")
+                    # Additional debug info
+                    if logger.isEnabledFor(logging.DEBUG):
                         file_stat = core_path.stat()
                         logger.debug(f"Core file modified: {time.ctime(file_stat.st_mtime)}")
                         logger.debug(f"Core file size: {file_stat.st_size} bytes")
-                    else:
-                        logger.warning("Could not extract version from lightscope_core.py")
-                        # Debug: show first few lines of file for troubleshooting
-                        lines = content.splitlines()[:50]
+                else:
+                    logger.warning("Could not extract version from lightscope_core.py")
+                    # Debug: show first few lines of file for troubleshooting
+                    if logger.isEnabledFor(logging.DEBUG):
+                        with open(core_path, 'r') as f:
+                            lines = [line.rstrip('\n') for _, line in zip(range(50), f)]
                         logger.debug("First 50 lines of core file:")
                         for i, line in enumerate(lines, 1):
                             if 'version' in line.lower() or 'ls_version' in line:
@@ -106,8 +252,10 @@ class SecureUpdater:
         
         try:
             if bundled_public_key_path.exists():
+                # Parsed into (n, e) for the pure-Python verifier, so the
+                # runner never imports cryptography
                 with open(bundled_public_key_path, 'rb') as f:
-                    self.public_key = serialization.load_pem_public_key(f.read())
+                    self.public_key = parse_rsa_public_key_pem(f.read())
                 logger.info("Loaded bundled public key from package")
                 return
             else:
@@ -118,34 +266,112 @@ class SecureUpdater:
             logger.error(f"Error loading bundled public key: {e}")
             self.public_key = None
     
+    def load_update_cache(self):
+        """Load the ETag/Last-Modified validators saved by the last version check"""
+        try:
+            if UPDATE_CACHE_PATH.exists():
+                with open(UPDATE_CACHE_PATH, 'r') as f:
+                    cache = json.load(f)
+                self._etag = cache.get('etag')
+                self._last_modified = cache.get('last_modified')
+                self._cached_version = cache.get('version')
+        except Exception as e:
+            logger.warning(f"Error loading update cache: {e}")
+    
+    def save_update_cache(self, etag, last_modified, version):
+        """Atomically persist the validators and version from a version check"""
+        self._etag = etag
+        self._last_modified = last_modified
+        self._cached_version = version
+        try:
+            temp_path = UPDATE_CACHE_PATH.with_suffix('.json.tmp')
+            with open(temp_path, 'w') as f:
+                json.dump({
+                    'etag': etag,
+                    'last_modified': last_modified,
+                    'version': version,
+                }, f)
+            os.replace(temp_path, UPDATE_CACHE_PATH)
+        except Exception as e:
+            logger.warning(f"Error saving update cache: {e}")
+    
+    def version_unmodified(self):
+        """Probe the version endpoint with HEAD and compare its Last-Modified
+        
+        Only used when the server gave no strong ETag for the conditional
+        GET to work with. Returns True if the version info is known to be
+        unchanged since the last check.
+        """
+        if not self._cached_version or not self._last_modified:
+            return False
+        if self._etag and not self._etag.startswith('W/'):
+            return False
+        
+        try:
+            response = HTTP.head(UPDATE_CHECK_URL, timeout=HTTP_TIMEOUT)
+            response.raise_for_status()
+        except requests.RequestException as e:
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"HEAD probe of {UPDATE_CHECK_URL} failed: {e}")
+            return False
+        
+        return response.headers.get('Last-Modified') == self._last_modified
+    
     def check_for_updates(self):
         """Check if a newer version is available"""
         try:
             logger.info(f"Checking for updates from: {UPDATE_CHECK_URL}")
-            response = urllib.request.urlopen(UPDATE_CHECK_URL, timeout=30)
-            response_data = response.read().decode('utf-8')
-            logger.info(f"Server response received from {UPDATE_CHECK_URL}")
-            logger.debug(f"Server response content: {response_data}")
-            
-            version_info = json.loads(response_data)
+            headers = {}
+            if self._cached_version:
+                if self._etag:
+                    headers['If-None-Match'] = self._etag
+                if self._last_modified:
+                    headers['If-Modified-Since'] = self._last_modified
             
-            latest_version = version_info.get('version')
-            if not latest_version:
-                logger.error("Invalid version response from server")
-                logger.error(f"Response data: {response_data}")
-                return False
+            # A HEAD probe showing an unchanged Last-Modified skips the GET entirely
+            response = None if self.version_unmodified() else HTTP.get(UPDATE_CHECK_URL, headers=headers, timeout=HTTP_TIMEOUT)
+            if response is None or response.status_code == 304:
+                # Version info unchanged since the last check, skip download and parse
+                logger.info(f"Version info not modified on {UPDATE_CHECK_URL}")
+                latest_version = self._cached_version
+            else:
+                response.raise_for_status()
+                response_data = response.text
+                logger.info(f"Server response received from {UPDATE_CHECK_URL}")
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(f"Server response content: {response_data}")
+                
+                version_info = json.loads(response_data)
+                
+                latest_version = version_info.get('version')
+                if not latest_version:
+                    logger.error("Invalid version response from server")
+                    logger.error(f"Response data: {response_data}")
+                    return False
+                
+                self.save_update_cache(
+                    response.headers.get('ETag'),
+                    response.headers.get('Last-Modified'),
+                    latest_version
+                )
             
+            self.latest_version = latest_version
             logger.info(f"Latest version: {latest_version}")
             logger.info(f"Current version: {self.current_version}")
             
-            if self.current_version != latest_version:
+            if is_newer_version(latest_version, self.current_version):
                 logger.info(f"Update available: {self.current_version} -> {latest_version}")
                 return True
+            elif latest_version != self.current_version and latest_version in self.load_backup_index():
+                # The server rolled back to a version we have run before;
+                # older versions are only ever installed from a local backup
+                logger.info(f"Rollback available from backup: {self.current_version} -> {latest_version}")
+                return True
             else:
                 logger.info("Already running latest version")
                 return False
                 
-        except urllib.error.URLError as e:
+        except requests.RequestException as e:
             logger.warning(f"Network error checking for updates: {e}")
             return False
         except json.JSONDecodeError as e:
@@ -156,44 +382,165 @@ class SecureUpdater:
             logger.error(f"Error checking for updates: {e}")
             return False
     
-    def verify_signature(self, file_path, signature_path):
-        """Verify the digital signature of a file"""
+    def verify_signature(self, file_path, signature_path, digest=None):
+        """Verify the digital signature of a file
+        
+        If the SHA-256 digest of the file was already computed (e.g. while
+        downloading it), pass it as digest so the file is not read again.
+        """
         if not self.public_key:
             logger.error("No public key available for signature verification")
             return False
         
         try:
-            # Read the file and signature
-            with open(file_path, 'rb') as f:
-                file_data = f.read()
+            if digest is None:
+                # Hash the file in chunks rather than loading it whole
+                sha256 = hashlib.sha256()
+                with open(file_path, 'rb') as f:
+                    for chunk in iter(lambda: f.read(DOWNLOAD_CHUNK_SIZE), b""):
+                        sha256.update(chunk)
+                digest = sha256.digest()
             
             with open(signature_path, 'rb') as f:
                 signature = f.read()
             
-            # Verify signature
-            self.public_key.verify(
-                signature,
-                file_data,
-                padding.PSS(
-                    mgf=padding.MGF1(hashes.SHA256()),
-                    salt_length=padding.PSS.MAX_LENGTH
-                ),
-                hashes.SHA256()
-            )
+            # A public-key verify takes about a millisecond, and this runs on
+            # the update check thread, not the scheduler thread
+            if not rsa_pss_verify(self.public_key, digest, signature):
+                logger.error("Invalid signature - file may be corrupted or tampered with")
+                return False
             
             logger.info("Signature verification successful")
             return True
             
-        except InvalidSignature:
-            logger.error("Invalid signature - file may be corrupted or tampered with")
-            return False
         except Exception as e:
             logger.error(f"Error verifying signature: {e}")
             return False
     
+    def fetch_to_file(self, url, dest_path):
+        """Stream a URL to disk over the shared HTTPS session
+        
+        Returns the SHA-256 digest of the downloaded bytes, computed in the
+        same pass that writes them.
+        """
+        sha256 = hashlib.sha256()
+        with HTTP.get(url, stream=True, timeout=HTTP_TIMEOUT) as response:
+            response.raise_for_status()
+            with open(dest_path, 'wb') as f:
+                # Reserve the advertised size up front to avoid fragmentation
+                content_length = response.headers.get('Content-Length')
+                if content_length and hasattr(os, 'posix_fallocate'):
+                    try:
+                        os.posix_fallocate(f.fileno(), 0, int(content_length))
+                    except (OSError, ValueError):
+                        pass
+                
+                for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                    sha256.update(chunk)
+                    f.write(chunk)
+                
+                # Drop any preallocated tail, e.g. when the body was decompressed
+                f.truncate()
+        return sha256.digest()
+    
+    def load_backup_index(self):
+        """Load the map of backed up versions to their core and signature files"""
+        try:
+            with open(BACKUP_INDEX_PATH, 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.warning(f"Error loading backup index: {e}")
+            return {}
+    
+    def save_backup_index(self, index):
+        """Atomically persist the backup index"""
+        try:
+            temp_path = BACKUP_INDEX_PATH.with_suffix('.json.tmp')
+            with open(temp_path, 'w') as f:
+                json.dump(index, f)
+            os.replace(temp_path, BACKUP_INDEX_PATH)
+        except Exception as e:
+            logger.warning(f"Error saving backup index: {e}")
+    
+    def restore_backup(self, version):
+        """Reinstall version from a local backup if one exists and still verifies
+        
+        Returns True if the backup was installed, in which case nothing needs
+        to be downloaded.
+        """
+        index = self.load_backup_index()
+        entry = index.get(version)
+        if not entry:
+            return False
+        
+        backup_path, backup_sig = (Path(path) for path in entry)
+        if backup_path.exists() and backup_sig.exists() and self.verify_signature(backup_path, backup_sig):
+            logger.info(f"Restoring version {version} from backup {backup_path}")
+            self.install_core(backup_path, backup_sig, link=True)
+            return True
+        
+        logger.warning(f"Backup of version {version} is missing or invalid, dropping it")
+        del index[version]
+        self.save_backup_index(index)
+        return False
+    
+    def install_core(self, core_path, signature_path, link=False):
+        """Install a verified core file and its signature, backing up the current one
+        
+        With link=True the files are hardlinked into place instead of copied
+        (for files that are already on this filesystem, e.g. backups).
+        """
+        # Stage the new version next to the current one and flush it to disk
+        # before it is swapped in
+        current_core = BIN_DIR / "lightscope_core.py"
+        current_sig = BIN_DIR / "lightscope_core.py.sig"
+        staged_core = BIN_DIR / "lightscope_core.py.new"
+        staged_sig = BIN_DIR / "lightscope_core.py.sig.new"
+        if link:
+            link_or_copy(core_path, staged_core)
+            link_or_copy(signature_path, staged_sig)
+        else:
+            copy_file(core_path, staged_core, fsync=True)
+            copy_file(signature_path, staged_sig, fsync=True)
+            os.chmod(staged_core, 0o644)
+        
+        # Backup current version as a hardlink, so no data is copied, and
+        # index it by version if its signature is known
+        if current_core.exists():
+            backup_path = UPDATES_DIR / f"lightscope_core_backup_{time.time_ns()}.py"
+            link_or_copy(current_core, backup_path)
+            logger.info(f"Backed up current version to {backup_path}")
+            
+            if current_sig.exists() and self.current_version:
+                backup_sig = UPDATES_DIR / f"{backup_path.name}.sig"
+                link_or_copy(current_sig, backup_sig)
+                index = self.load_backup_index()
+                index[self.current_version] = [str(backup_path), str(backup_sig)]
+                self.save_backup_index(index)
+        
+        # Install new version; os.replace is atomic, so there is no window
+        # where lightscope_core.py is missing or partial
+        os.replace(staged_core, current_core)
+        os.replace(staged_sig, current_sig)
+        fsync_directory(BIN_DIR)
+        
+        logger.info("Update installed successfully")
+        
+        # Update current version
+        self.load_current_version()
+    
     def download_update(self):
         """Download and verify the latest version"""
         try:
+            # A version we have run before can be restored without downloading
+            if self.latest_version and self.restore_backup(self.latest_version):
+                return True
+            if not is_newer_version(self.latest_version, self.current_version):
+                logger.error(f"No valid backup of version {self.latest_version}, not downgrading")
+                return False
+            
             # Create temporary directory for download
             with tempfile.TemporaryDirectory() as temp_dir:
                 temp_path = Path(temp_dir)
@@ -204,55 +551,123 @@ class SecureUpdater:
                 
                 logger.info("Downloading new version...")
                 
-                # Download core file
-                core_temp_path = temp_path / "lightscope_core.py"
-                urllib.request.urlretrieve(core_url, core_temp_path)
+                # Download core file and signature concurrently over the
+                # shared session's connection pool
+                from concurrent.futures import ThreadPoolExecutor
                 
-                # Download signature
+                core_temp_path = temp_path / "lightscope_core.py"
                 sig_temp_path = temp_path / "lightscope_core.py.sig"
-                urllib.request.urlretrieve(signature_url, sig_temp_path)
+                with ThreadPoolExecutor(max_workers=2) as executor:
+                    core_future = executor.submit(self.fetch_to_file, core_url, core_temp_path)
+                    sig_future = executor.submit(self.fetch_to_file, signature_url, sig_temp_path)
+                    core_digest = core_future.result()
+                    sig_future.result()
                 
                 # Verify signature
-                if not self.verify_signature(core_temp_path, sig_temp_path):
+                if not self.verify_signature(core_temp_path, sig_temp_path, core_digest):
                     logger.error("Signature verification failed - update aborted")
                     return False
                 
-                # Backup current version
-                current_core = BIN_DIR / "lightscope_core.py"
-                if current_core.exists():
-                    backup_path = UPDATES_DIR / f"lightscope_core_backup_{int(time.time())}.py"
-                    current_core.rename(backup_path)
-                    logger.info(f"Backed up current version to {backup_path}")
-                
-                # Install new version
-                import shutil
-                shutil.copy2(core_temp_path, current_core)
-                os.chmod(current_core, 0o644)
-                
-                logger.info("Update installed successfully")
-                
-                # Update current version
-                self.load_current_version()
+                self.install_core(core_temp_path, sig_temp_path)
                 return True
                 
         except Exception as e:
             logger.error(f"Error downloading update: {e}")
             return False
 
+def copy_file(src_path, dst_path, fsync=False):
+    """Copy a file in the kernel with os.sendfile, without metadata
+    
+    Falls back to a userspace copy where sendfile is not supported.
+    """
+    with open(src_path, 'rb') as src, open(dst_path, 'wb') as dst:
+        offset = 0
+        try:
+            while True:
+                sent = os.sendfile(dst.fileno(), src.fileno(), offset, DOWNLOAD_CHUNK_SIZE)
+                if not sent:
+                    break
+                offset += sent
+        except (AttributeError, OSError):
+            if offset:
+                raise
+            import shutil
+            shutil.copyfileobj(src, dst)
+        
+        if fsync:
+            dst.flush()
+            os.fsync(dst.fileno())
+
+def link_or_copy(src_path, dst_path):
+    """Hardlink src_path to dst_path, replacing dst_path, or copy if linking fails"""
+    try:
+        os.unlink(dst_path)
+    except FileNotFoundError:
+        pass
+    try:
+        os.link(src_path, dst_path)
+    except OSError:
+        copy_file(src_path, dst_path, fsync=True)
+
+def fsync_directory(path):
+    """Flush directory entry changes (e.g. a rename) in path to disk"""
+    dir_fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(dir_fd)
+    finally:
+        os.close(dir_fd)
+
+def open_notify_socket():
+    """Connect once to systemd's notification socket, if one was provided
+    
+    Keeping the socket open turns each watchdog ping into a single send()
+    instead of systemd.daemon.notify's socket/connect/sendto/close.
+    """
+    global notify_socket
+    
+    path = os.environ.get('NOTIFY_SOCKET')
+    if not path:
+        return
+    if path.startswith('@'):
+        # Abstract namespace socket
+        path = '\0' + path[1:]
+    
+    try:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        sock.connect(path)
+        notify_socket = sock
+    except OSError as e:
+        logger.warning(f"Failed to connect to systemd notification socket: {e}")
+
+def systemd_notify_available():
+    """Return True if notifications can be sent to systemd"""
+    return notify_socket is not None or SYSTEMD_AVAILABLE
+
+def systemd_notify(state):
+    """Send a state string to systemd"""
+    if notify_socket is not None:
+        try:
+            notify_socket.send(state.encode())
+            return
+        except OSError as e:
+            logger.warning(f"Notification socket send failed, falling back: {e}")
+    if SYSTEMD_AVAILABLE:
+        systemd.daemon.notify(state)
+
 def notify_systemd_watchdog():
     """Send watchdog notification to systemd"""
-    if SYSTEMD_AVAILABLE:
+    if systemd_notify_available():
         try:
-            systemd.daemon.notify('WATCHDOG=1')
+            systemd_notify('WATCHDOG=1')
             logger.debug("Sent watchdog notification to systemd")
         except Exception as e:
             logger.warning(f"Failed to send watchdog notification: {e}")
 
 def notify_systemd_ready():
     """Notify systemd that the service is ready"""
-    if SYSTEMD_AVAILABLE:
+    if systemd_notify_available():
         try:
-            systemd.daemon.notify('READY=1')
+            systemd_notify('READY=1')
             logger.info("Notified systemd that service is ready")
         except Exception as e:
             logger.warning(f"Failed to notify systemd ready: {e}")
@@ -262,62 +677,98 @@ def ensure_directories():
     for directory in [CONFIG_DIR, UPDATES_DIR, LOGS_DIR, BIN_DIR]:
         directory.mkdir(parents=True, exist_ok=True)
 
-def update_checker_thread(updater):
-    """Background thread that periodically checks for updates"""
-    logger.info("Update checker thread started")
-    last_update_check = time.time()
-    update_interval = 60 * 60  # Every hour
+class Scheduler:
+    """Runs periodic callbacks on the calling thread, parked on shutdown_event"""
     
-    while not shutdown_event.is_set():
-        try:
-            current_time = time.time()
+    def __init__(self):
+        self._heap = []
+        self._counter = itertools.count()
+    
+    def schedule(self, interval, fn, delay=None):
+        """Run fn every interval seconds, first after delay (default: interval)"""
+        if delay is None:
+            delay = interval
+        heapq.heappush(self._heap, (time.monotonic() + delay, next(self._counter), interval, fn))
+    
+    def run(self, until=None, timeout=None):
+        """Run scheduled callbacks until shutdown is requested
+        
+        Also returns once until() is true (checked whenever the scheduler
+        wakes) or after timeout seconds.
+        """
+        end = None if timeout is None else time.monotonic() + timeout
+        
+        while self._heap and not shutdown_event.is_set():
+            if until is not None and until():
+                break
             
-            # Check for updates periodically
-            if current_time - last_update_check > update_interval:
-                logger.info("Performing periodic update check...")
-                if updater.check_for_updates():
-                    logger.info("Update available! Downloading...")
-                    if updater.download_update():
-                        logger.info("Update downloaded successfully, signaling restart...")
-                        update_available_event.set()
-                        break
-                    else:
-                        logger.error("Update download failed")
-                
-                last_update_check = current_time
+            deadline, seq, interval, fn = self._heap[0]
+            now = time.monotonic()
+            if end is not None and now >= end:
+                break
+            if now < deadline:
+                shutdown_event.wait(min(deadline, end or deadline) - now)
+                continue
             
-            # Sleep for 60 seconds before next check (or until shutdown)
-            shutdown_event.wait(60)
+            try:
+                fn()
+            except Exception as e:
+                logger.error(f"Error in scheduled task: {e}")
             
-        except Exception as e:
-            logger.error(f"Error in update checker thread: {e}")
-            # Sleep before retrying
-            shutdown_event.wait(300)  # 5 minutes
-    
-    logger.info("Update checker thread exiting")
+            # Advance from the previous deadline rather than from now, so the
+            # cadence does not drift by the callbacks' run time
+            next_deadline = deadline + interval
+            now = time.monotonic()
+            if next_deadline <= now:
+                # Fell a whole interval behind; skip the missed runs
+                next_deadline = now + interval
+            heapq.heapreplace(self._heap, (next_deadline, seq, interval, fn))
 
-def watchdog_thread():
-    """Background thread that sends systemd watchdog notifications"""
-    logger.info("Watchdog thread started")
+def run_update_check(updater):
+    """Check for, download and stage an update"""
+    try:
+        logger.info("Performing periodic update check...")
+        if updater.check_for_updates():
+            logger.info("Update available! Downloading...")
+            if updater.download_update():
+                logger.info("Update downloaded successfully, signaling restart...")
+                update_available_event.set()
+            else:
+                logger.error("Update download failed")
+    except Exception as e:
+        logger.error(f"Error in update check: {e}")
+
+def start_update_check(updater):
+    """Start an update check in a worker thread
     
-    while not shutdown_event.is_set():
-        try:
-            notify_systemd_watchdog()
-            # Sleep for 15 seconds before next watchdog
-            shutdown_event.wait(15)
-        except Exception as e:
-            logger.error(f"Error in watchdog thread: {e}")
-            shutdown_event.wait(15)
+    Downloads can take longer than the systemd watchdog timeout, so they
+    must not run on the main thread that runs the scheduler.
+    """
+    global update_check_worker
+    
+    if update_available_event.is_set():
+        return
+    if update_check_worker and update_check_worker.is_alive():
+        logger.warning("Previous update check still running, skipping")
+        return
     
-    logger.info("Watchdog thread exiting")
+    update_check_worker = threading.Thread(target=run_update_check, args=(updater,), name="Update-Check")
+    update_check_worker.daemon = True
+    update_check_worker.start()
 
 def signal_handler(signum, frame):
     """Handle shutdown signals"""
     logger.info(f"Received signal {signum}, initiating shutdown...")
+    stop_requested_event.set()
     shutdown_event.set()
 
-def load_lightscope_core():
-    """Dynamically load and execute lightscope_core.py with proper threading support"""
+def load_lightscope_core(scheduler):
+    """Dynamically load and execute lightscope_core.py with proper threading support
+    
+    The core runs in its own thread while this thread runs the scheduler
+    (watchdog pings and update checks) until the core exits or a shutdown
+    or update is signaled.
+    """
     global lightscope_process
     
     try:
@@ -331,15 +782,12 @@ def load_lightscope_core():
         if str(BIN_DIR) not in sys.path:
             sys.path.insert(0, str(BIN_DIR))
         
-        # Import the core module (fresh import to get any updates)
-        import importlib
-        if 'lightscope_core' in sys.modules:
-            importlib.reload(sys.modules['lightscope_core'])
-        else:
-            import lightscope_core
+        # Import the core module. Updates are picked up by re-executing the
+        # runner (see restart_runner), never by reloading the module in place.
+        import lightscope_core
         
         # Set global references for the core
-        if SYSTEMD_AVAILABLE:
+        if systemd_notify_available():
             lightscope_core.systemd_watchdog_notify = notify_systemd_watchdog
         
         # Set shutdown event reference so core can check for shutdown
@@ -349,6 +797,8 @@ def load_lightscope_core():
         # Run the main function in a way that can be interrupted
         logger.info("Starting LightScope core...")
         
+        core_done = threading.Event()
+        
         def run_core():
             try:
                 lightscope_core.lightscope_run()
@@ -357,6 +807,8 @@ def load_lightscope_core():
                 import traceback
                 logger.error(f"Traceback: {traceback.format_exc()}")
                 shutdown_event.set()
+            finally:
+                core_done.set()
         
         # Start LightScope in a separate thread so we can monitor for updates
         core_thread = threading.Thread(target=run_core, name="LightScope-Core")
@@ -364,18 +816,17 @@ def load_lightscope_core():
         core_thread.start()
         lightscope_process = core_thread
         
-        # Wait for either shutdown or update signal
-        while core_thread.is_alive():
-            if shutdown_event.is_set():
-                logger.info("Shutdown requested, stopping LightScope core...")
-                break
-            elif update_available_event.is_set():
-                logger.info("Update available, stopping LightScope core for restart...")
-                shutdown_event.set()
-                break
-            
-            # Check every second
-            time.sleep(1)
+        # Run scheduled tasks until the core exits or a shutdown/update
+        # signal arrives. Shutdown wakes the scheduler immediately; core exit
+        # and updates are picked up on its next wakeup (at most
+        # WATCHDOG_INTERVAL later).
+        scheduler.run(until=lambda: core_done.is_set() or update_available_event.is_set())
+        
+        if update_available_event.is_set():
+            logger.info("Update available, stopping LightScope core for restart...")
+            shutdown_event.set()
+        elif shutdown_event.is_set():
+            logger.info("Shutdown requested, stopping LightScope core...")
         
         # Wait for core thread to finish (with timeout)
         core_thread.join(timeout=30)
@@ -397,6 +848,28 @@ def load_lightscope_core():
         logger.error(f"Traceback: {traceback.format_exc()}")
         return False
 
+def restart_runner():
+    """Replace this process with a fresh runner to load the updated core
+    
+    Re-executing instead of reloading lightscope_core in place leaves no
+    stale module objects, threads or file descriptors behind. The PID is
+    unchanged, so systemd keeps supervising the new runner.
+    """
+    import multiprocessing
+    
+    logger.info("Restarting with updated version...")
+    shutdown_event.set()
+    
+    # Stop the old core's worker processes so they don't run alongside the new ones
+    children = multiprocessing.active_children()
+    for child in children:
+        child.terminate()
+    for child in children:
+        child.join(timeout=5)
+    
+    logging.shutdown()
+    os.execv(sys.executable, [sys.executable] + sys.argv)
+
 def main():
     """Main runner function with proper threading architecture"""
     logger.info("LightScope Runner starting...")
@@ -412,6 +885,9 @@ def main():
     updater = SecureUpdater()
     
     # Notify systemd that we're ready to start
+    open_notify_socket()
+    if not systemd_notify_available():
+        logger.warning("systemd notification socket not available, watchdog notifications disabled")
     notify_systemd_ready()
     
     try:
@@ -423,30 +899,26 @@ def main():
             else:
                 logger.error("Startup update failed, continuing with current version")
         
-        # Start background threads
-        update_thread = threading.Thread(target=update_checker_thread, args=(updater,), name="Update-Checker")
-        update_thread.daemon = True
-        update_thread.start()
-        
-        watchdog_bg_thread = threading.Thread(target=watchdog_thread, name="Watchdog")
-        watchdog_bg_thread.daemon = True
-        watchdog_bg_thread.start()
+        # Watchdog pings and update checks run from the main thread's
+        # scheduler while the core runs in its own thread
+        scheduler = Scheduler()
+        scheduler.schedule(WATCHDOG_INTERVAL, notify_systemd_watchdog, delay=0)
+        scheduler.schedule(UPDATE_CHECK_INTERVAL, lambda: start_update_check(updater))
         
         consecutive_failures = 0
         max_consecutive_failures = 5
         
         # Main execution loop
         while not shutdown_event.is_set():
-            result = load_lightscope_core()
+            result = load_lightscope_core(scheduler)
             
             if result == "restart":
+                if stop_requested_event.is_set():
+                    # The update will be picked up on the next start
+                    logger.info("Stop requested, not restarting after update")
+                    break
                 # Update was installed, restart with new version
-                logger.info("Restarting with updated version...")
-                consecutive_failures = 0
-                # Clear the update event and continue
-                update_available_event.clear()
-                shutdown_event.clear()
-                continue
+                restart_runner()
             elif result:
                 # Normal shutdown
                 break
@@ -459,22 +931,16 @@ def main():
                     logger.error("Too many consecutive failures, exiting...")
                     sys.exit(1)
                 
-                # Wait before retry with exponential backoff
+                # Wait before retry with exponential backoff, keeping the
+                # watchdog fed meanwhile
                 sleep_time = min(10 * (2 ** (consecutive_failures - 1)), 60)
                 logger.info(f"Retrying in {sleep_time} seconds...")
                 
-                for _ in range(sleep_time):
-                    if shutdown_event.is_set():
-                        break
-                    time.sleep(1)
+                scheduler.run(timeout=sleep_time)
         
-        logger.info("Main loop exiting, shutting down threads...")
+        logger.info("Main loop exiting, shutting down...")
         shutdown_event.set()
         
-        # Wait for threads to finish
-        update_thread.join(timeout=5)
-        watchdog_bg_thread.join(timeout=5)
-        
     except KeyboardInterrupt:
         logger.info("Received interrupt, shutting down...")
         shutdown_event.set()
@@ -8,18 +8,41 @@ import os
 import sys
 import time
 import json
+import re
 import hashlib
 import logging
+import logging.handlers
+import functools
+import multiprocessing
+import importlib.util
 import tempfile
 import subprocess
-import urllib.request
-import urllib.error
+import ctypes
 from pathlib import Path
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from cryptography.hazmat.primitives import hashes, serialization
 from cryptography.hazmat.primitives.asymmetric import rsa, padding
+from cryptography.hazmat.primitives.asymmetric.utils import Prehashed
 from cryptography.exceptions import InvalidSignature
 import psutil
 
+# Import version parsing support
+try:
+    from packaging.version import Version, InvalidVersion
+    PACKAGING_AVAILABLE = True
+except ImportError:
+    PACKAGING_AVAILABLE = False
+
+# shell32.IsUserAnAdmin, resolved and prototyped once (None off Windows)
+try:
+    _IsUserAnAdmin = ctypes.windll.shell32.IsUserAnAdmin
+    _IsUserAnAdmin.argtypes = []
+    _IsUserAnAdmin.restype = ctypes.c_int
+except (AttributeError, OSError):
+    _IsUserAnAdmin = None
+
 # Configuration
 # Dynamically determine installation directory based on script location
 SCRIPT_DIR = Path(__file__).parent.absolute()
@@ -39,8 +62,30 @@ BIN_DIR = LIGHTSCOPE_HOME / "bin"
 if not BIN_DIR.exists():
     BIN_DIR = LIGHTSCOPE_HOME
 
+# Locations searched for lightscope_core.py, resolved once at import;
+# CORE_PATH is None until the core has been installed
+CORE_SEARCH_PATHS = (
+    BIN_DIR / "lightscope_core.py",
+    LIGHTSCOPE_HOME / "lightscope_core.py",
+    SCRIPT_DIR / "lightscope_core.py",
+)
+CORE_PATH = next((path for path in CORE_SEARCH_PATHS if path.exists()), None)
+
+# Created once all directories exist, so later starts skip the mkdir calls
+DIRS_MARKER_PATH = LIGHTSCOPE_HOME / ".dirs_ok"
+
+# Records where Npcap was detected and that path's mtime, so later starts
+# skip the probe until Npcap is removed or reinstalled
+NPCAP_SENTINEL_PATH = LIGHTSCOPE_HOME / ".npcap_ok"
+
 UPDATE_CHECK_URL = "https://thelightscope.com/latest/version"
 DOWNLOAD_URL_BASE = "https://thelightscope.com/latest"
+UPDATE_CACHE_PATH = CONFIG_DIR / "update_cache.json"
+PUBLIC_KEY_PATH = CONFIG_DIR / "lightscope-public.pem"
+
+# Matches the ls_version = "x.x.x" line, which sits near the top of lightscope_core.py
+_VERSION_RE = re.compile(rb'ls_version\s*=\s*["\']([^"\']+)["\']')
+VERSION_HEAD_SIZE = 4096
 
 # Ensure logs directory exists before setting up logging
 LOGS_DIR.mkdir(parents=True, exist_ok=True)
@@ -50,33 +95,70 @@ logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
     handlers=[
-        logging.FileHandler(LOGS_DIR / "lightscope-runner.log"),
+        logging.handlers.RotatingFileHandler(
+            LOGS_DIR / "lightscope-runner.log",
+            maxBytes=4 * 1024 * 1024,
+            backupCount=4,
+            delay=True
+        ),
         logging.StreamHandler()
     ]
 )
 logger = logging.getLogger("lightscope-runner")
 
+# Shared HTTPS session so every request this process makes reuses
+# keep-alive connections instead of paying a TLS handshake per request
+HTTP = requests.Session()
+HTTP.mount("https://", HTTPAdapter(
+    pool_connections=1,
+    pool_maxsize=4,
+    pool_block=False,
+    max_retries=Retry(total=2, backoff_factor=0.5)
+))
+HTTP_TIMEOUT = 30  # seconds
+
+def parse_version(version):
+    """Parse a version string into a comparable object, or None"""
+    if PACKAGING_AVAILABLE:
+        try:
+            return Version(version)
+        except InvalidVersion:
+            pass
+    try:
+        # Plain dotted numeric versions, e.g. "1.10.0" > "1.9.0"
+        return tuple(int(part) for part in version.split('.'))
+    except ValueError:
+        return None
+
 class SecureUpdater:
     """Handles secure downloading and verification of LightScope updates"""
     
     def __init__(self):
-        self.public_key = None
         self.current_version = None
+        self._current_v = None  # current_version parsed once by parse_version
+        self.latest_version = None  # version advertised by the last check
+        # Validators from the last version check, used for conditional requests
+        self._etag = None
+        self._last_modified = None
+        self._cached_version = None
         self.load_current_version()
-        self.load_public_key()
+        self.load_update_cache()
     
     def load_current_version(self):
         """Load current version from lightscope_core.py"""
         try:
             core_path = BIN_DIR / "lightscope_core.py"
             if core_path.exists():
-                with open(core_path, 'r') as f:
-                    content = f.read()
-                    # Extract version from ls_version = "x.x.x" line
-                    import re
-                    match = re.search(r'ls_version\s*=\s*["\']([^"\']+)["\']', content)
+                with open(core_path, 'rb') as f:
+                    # Extract version from ls_version = "x.x.x" line, reading
+                    # the rest of the file only if it is not in the head
+                    content = f.read(VERSION_HEAD_SIZE)
+                    match = _VERSION_RE.search(content)
+                    if not match:
+                        match = _VERSION_RE.search(content + f.read())
                     if match:
-                        self.current_version = match.group(1)
+                        self.current_version = match.group(1).decode()
+                        self._current_v = parse_version(self.current_version)
                         logger.info(f"Current version: {self.current_version}")
                     else:
                         logger.warning("Could not extract version from lightscope_core.py")
@@ -85,76 +167,148 @@ class SecureUpdater:
         except Exception as e:
             logger.error(f"Error loading current version: {e}")
     
+    @functools.cached_property
+    def public_key(self):
+        """The bundled public key, loaded on first use (None if unavailable)"""
+        return self.load_public_key()
+    
     def load_public_key(self):
         """Load the bundled public key for signature verification"""
-        # Try bundled public key first (installed with package)
-        bundled_public_key_path = CONFIG_DIR / "lightscope-public.pem"
-        
         try:
-            if bundled_public_key_path.exists():
-                with open(bundled_public_key_path, 'rb') as f:
-                    self.public_key = serialization.load_pem_public_key(f.read())
-                logger.info("Loaded bundled public key from package")
-                return
-            else:
+            if not PUBLIC_KEY_PATH.exists():
                 logger.error("Bundled public key not found in package installation")
-                self.public_key = None
-                
+                return None
+            
+            with open(PUBLIC_KEY_PATH, 'rb') as f:
+                public_key = serialization.load_pem_public_key(f.read())
+            logger.info("Loaded bundled public key from package")
+            return public_key
+            
         except Exception as e:
             logger.error(f"Error loading bundled public key: {e}")
-            self.public_key = None
+            return None
+    
+    def load_update_cache(self):
+        """Load the ETag/Last-Modified validators saved by the last version check"""
+        try:
+            if UPDATE_CACHE_PATH.exists():
+                with open(UPDATE_CACHE_PATH, 'r') as f:
+                    cache = json.load(f)
+                self._etag = cache.get('etag')
+                self._last_modified = cache.get('last_modified')
+                self._cached_version = cache.get('version')
+        except Exception as e:
+            logger.warning(f"Error loading update cache: {e}")
+    
+    def save_update_cache(self, etag, last_modified, version):
+        """Atomically persist the validators and version from a version check"""
+        self._etag = etag
+        self._last_modified = last_modified
+        self._cached_version = version
+        try:
+            temp_path = UPDATE_CACHE_PATH.with_suffix('.json.tmp')
+            with open(temp_path, 'w') as f:
+                json.dump({
+                    'etag': etag,
+                    'last_modified': last_modified,
+                    'version': version,
+                }, f)
+            os.replace(temp_path, UPDATE_CACHE_PATH)
+        except Exception as e:
+            logger.warning(f"Error saving update cache: {e}")
+    
+    def _get(self, url, headers=None, stream=False):
+        """GET a URL over the shared keep-alive session"""
+        response = HTTP.get(url, headers=headers, stream=stream, timeout=HTTP_TIMEOUT)
+        if response.status_code != 304:
+            response.raise_for_status()
+        return response
     
     def check_for_updates(self):
         """Check if a newer version is available"""
         try:
             logger.info("Checking for updates...")
-            response = urllib.request.urlopen(UPDATE_CHECK_URL, timeout=30)
-            version_info = json.loads(response.read().decode('utf-8'))
+            headers = {}
+            if self._cached_version:
+                if self._etag:
+                    headers['If-None-Match'] = self._etag
+                if self._last_modified:
+                    headers['If-Modified-Since'] = self._last_modified
             
-            latest_version = version_info.get('version')
-            if not latest_version:
-                logger.error("Invalid version response from server")
-                return False
+            response = self._get(UPDATE_CHECK_URL, headers=headers)
+            if response.status_code == 304:
+                # Version info unchanged since the last check, skip download and parse
+                logger.info("Version info not modified since last check")
+                latest_version = self._cached_version
+            else:
+                version_info = json.loads(response.content)
+                
+                latest_version = version_info.get('version')
+                if not latest_version:
+                    logger.error("Invalid version response from server")
+                    return False
+                
+                self.save_update_cache(
+                    response.headers.get('ETag'),
+                    response.headers.get('Last-Modified'),
+                    latest_version
+                )
             
+            self.latest_version = latest_version
             logger.info(f"Latest version: {latest_version}")
             
-            if self.current_version != latest_version:
+            latest_v = parse_version(latest_version)
+            if self._current_v is not None and type(latest_v) is type(self._current_v):
+                # Only upgrade, never downgrade
+                update_available = latest_v > self._current_v
+            else:
+                update_available = self.current_version != latest_version
+            
+            if update_available:
                 logger.info(f"Update available: {self.current_version} -> {latest_version}")
                 return True
             else:
                 logger.info("Already running latest version")
                 return False
                 
-        except urllib.error.URLError as e:
+        except requests.RequestException as e:
             logger.warning(f"Network error checking for updates: {e}")
             return False
         except Exception as e:
             logger.error(f"Error checking for updates: {e}")
             return False
     
-    def verify_signature(self, file_path, signature_path):
-        """Verify the digital signature of a file"""
+    def verify_signature(self, file_path, signature_path, digest=None):
+        """Verify the digital signature of a file
+        
+        If the SHA-256 digest of the file was already computed (e.g. while
+        downloading it), pass it as digest so the file is not read again.
+        """
         if not self.public_key:
             logger.error("No public key available for signature verification")
             return False
         
         try:
-            # Read the file and signature
-            with open(file_path, 'rb') as f:
-                file_data = f.read()
+            if digest is None:
+                # Hash the file in chunks rather than loading it whole
+                sha256 = hashlib.sha256()
+                with open(file_path, 'rb') as f:
+                    while chunk := f.read(65536):
+                        sha256.update(chunk)
+                digest = sha256.digest()
             
             with open(signature_path, 'rb') as f:
                 signature = f.read()
             
-            # Verify signature
+            # Verify signature over the precomputed digest
             self.public_key.verify(
                 signature,
-                file_data,
+                digest,
                 padding.PSS(
                     mgf=padding.MGF1(hashes.SHA256()),
                     salt_length=padding.PSS.MAX_LENGTH
                 ),
-                hashes.SHA256()
+                Prehashed(hashes.SHA256())
             )
             
             logger.info("Signature verification successful")
@@ -167,42 +321,116 @@ class SecureUpdater:
             logger.error(f"Error verifying signature: {e}")
             return False
     
+    def fetch_to_file(self, url, dest_path):
+        """Stream a URL to disk, returning the SHA-256 digest of its bytes
+        
+        The digest is computed in the same pass that writes the file.
+        """
+        sha256 = hashlib.sha256()
+        with self._get(url, stream=True) as response:
+            with open(dest_path, 'wb') as f:
+                for chunk in response.iter_content(chunk_size=65536):
+                    sha256.update(chunk)
+                    f.write(chunk)
+        return sha256.digest()
+    
+    def verify_manifest(self, manifest_path, signature_path):
+        """Verify a signed release manifest
+        
+        Returns the manifest, or None if the signature is invalid. One
+        signature check then covers every file listed in its 'files' map of
+        {filename: sha256 hex}.
+        """
+        if not self.verify_signature(manifest_path, signature_path):
+            return None
+        with open(manifest_path, 'r') as f:
+            return json.load(f)
+    
     def download_update(self):
         """Download and verify the latest version"""
         try:
-            # Create temporary directory for download
-            with tempfile.TemporaryDirectory() as temp_dir:
+            # Create temporary directory for download on the same volume as
+            # the install, so the new version can be renamed into place
+            with tempfile.TemporaryDirectory(dir=str(UPDATES_DIR)) as temp_dir:
                 temp_path = Path(temp_dir)
                 
                 # Download the new lightscope_core.py
                 core_url = f"{DOWNLOAD_URL_BASE}/lightscope_core.py"
                 signature_url = f"{DOWNLOAD_URL_BASE}/lightscope_core.py.sig"
+                manifest_url = f"{DOWNLOAD_URL_BASE}/manifest.json"
+                manifest_signature_url = f"{DOWNLOAD_URL_BASE}/manifest.json.sig"
                 
                 logger.info("Downloading new version...")
                 
-                # Download core file
-                core_temp_path = temp_path / "lightscope_core.py"
-                urllib.request.urlretrieve(core_url, core_temp_path)
+                # Download the core file, its signature and the signed manifest
+                # concurrently, hashing the core as it is written
+                from concurrent.futures import ThreadPoolExecutor
                 
-                # Download signature
+                core_temp_path = temp_path / "lightscope_core.py"
                 sig_temp_path = temp_path / "lightscope_core.py.sig"
-                urllib.request.urlretrieve(signature_url, sig_temp_path)
+                manifest_temp_path = temp_path / "manifest.json"
+                manifest_sig_temp_path = temp_path / "manifest.json.sig"
+                with ThreadPoolExecutor(max_workers=4) as executor:
+                    core_future = executor.submit(self.fetch_to_file, core_url, core_temp_path)
+                    sig_future = executor.submit(self.fetch_to_file, signature_url, sig_temp_path)
+                    manifest_future = executor.submit(self.fetch_to_file, manifest_url, manifest_temp_path)
+                    manifest_sig_future = executor.submit(self.fetch_to_file, manifest_signature_url, manifest_sig_temp_path)
+                    core_digest = core_future.result()
+                    # The manifest is optional; any failure to fetch it falls
+                    # back to the core signature
+                    try:
+                        manifest_future.result()
+                        manifest_sig_future.result()
+                        has_manifest = True
+                    except requests.HTTPError as e:
+                        if e.response is None or e.response.status_code != 404:
+                            logger.warning(f"Could not download release manifest: {e}")
+                        has_manifest = False
+                    except (requests.RequestException, OSError) as e:
+                        logger.warning(f"Could not download release manifest: {e}")
+                        has_manifest = False
+                    # Only needed if the manifest does not verify the core
+                    sig_error = sig_future.exception()
                 
-                # Verify signature
-                if not self.verify_signature(core_temp_path, sig_temp_path):
-                    logger.error("Signature verification failed - update aborted")
-                    return False
+                # Verify the manifest signature, then the core against it. A
+                # manifest that is invalid, for another version or not listing
+                # this core (e.g. only the core and .sig were uploaded) falls
+                # back to the core's own signature, which is always published
+                verified = False
+                if has_manifest:
+                    manifest = self.verify_manifest(manifest_temp_path, manifest_sig_temp_path)
+                    if manifest is None:
+                        logger.warning("Manifest signature verification failed, verifying core signature")
+                    elif manifest.get("version") != self.latest_version:
+                        logger.warning(f"Manifest is for version {manifest.get('version')}, not {self.latest_version}, verifying core signature")
+                    elif manifest.get("files", {}).get("lightscope_core.py") != core_digest.hex():
+                        logger.warning("lightscope_core.py does not match the manifest, verifying core signature")
+                    else:
+                        verified = True
+                else:
+                    # Releases without a manifest only sign the core file itself
+                    logger.info("No release manifest available, verifying core signature")
+                
+                if not verified:
+                    if sig_error is not None:
+                        raise sig_error
+                    if not self.verify_signature(core_temp_path, sig_temp_path, core_digest):
+                        logger.error("Signature verification failed - update aborted")
+                        return False
                 
-                # Backup current version
+                # Backup current version as a hardlink, so lightscope_core.py
+                # stays in place until the new version replaces it
                 current_core = BIN_DIR / "lightscope_core.py"
                 if current_core.exists():
                     backup_path = UPDATES_DIR / f"lightscope_core_backup_{int(time.time())}.py"
-                    current_core.rename(backup_path)
+                    try:
+                        os.link(current_core, backup_path)
+                    except OSError:
+                        current_core.rename(backup_path)
                     logger.info(f"Backed up current version to {backup_path}")
                 
-                # Install new version
-                import shutil
-                shutil.copy2(core_temp_path, current_core)
+                # Install new version with an atomic rename
+                os.replace(core_temp_path, current_core)
                 
                 logger.info("Update installed successfully")
                 
@@ -212,43 +440,55 @@ class SecureUpdater:
                 
         except Exception as e:
             logger.error(f"Error downloading update: {e}")
+            if isinstance(e, FileNotFoundError):
+                # A directory may have been removed; recreate them on next start
+                DIRS_MARKER_PATH.unlink(missing_ok=True)
             return False
 
 def ensure_directories():
     """Ensure all required directories exist"""
+    if DIRS_MARKER_PATH.exists():
+        return
     for directory in [CONFIG_DIR, UPDATES_DIR, LOGS_DIR, BIN_DIR]:
         directory.mkdir(parents=True, exist_ok=True)
+    DIRS_MARKER_PATH.touch()
 
 def load_lightscope_core():
     """Dynamically load and execute lightscope_core.py"""
+    global CORE_PATH
+    
     try:
-        # Try to find lightscope_core.py in multiple locations
-        possible_paths = [
-            BIN_DIR / "lightscope_core.py",
-            LIGHTSCOPE_HOME / "lightscope_core.py",
-            SCRIPT_DIR / "lightscope_core.py",
-        ]
-        
-        core_path = None
-        for path in possible_paths:
-            if path.exists():
-                core_path = path
-                logger.info(f"Found lightscope_core.py at: {core_path}")
-                break
+        # Only search again if the core was missing at import (e.g. it was
+        # just installed by the startup update)
+        if CORE_PATH is None:
+            CORE_PATH = next((path for path in CORE_SEARCH_PATHS if path.exists()), None)
+        core_path = CORE_PATH
         
         if not core_path:
             logger.error(f"lightscope_core.py not found! Searched in:")
-            for path in possible_paths:
+            for path in CORE_SEARCH_PATHS:
                 logger.error(f"  - {path}")
             return False
+        logger.info(f"Found lightscope_core.py at: {core_path}")
         
-        # Add the directory containing lightscope_core.py to Python path
+        # Keep the core's directory on the Python path: multiprocessing
+        # workers are spawned on Windows and import lightscope_core by name
         core_dir = core_path.parent
         if str(core_dir) not in sys.path:
             sys.path.insert(0, str(core_dir))
         
-        # Import the core module
-        import lightscope_core
+        # Import the core module straight from its file, without searching
+        # sys.path for it
+        lightscope_core = sys.modules.get("lightscope_core")
+        if lightscope_core is None:
+            spec = importlib.util.spec_from_file_location("lightscope_core", core_path)
+            lightscope_core = importlib.util.module_from_spec(spec)
+            sys.modules["lightscope_core"] = lightscope_core
+            try:
+                spec.loader.exec_module(lightscope_core)
+            except BaseException:
+                del sys.modules["lightscope_core"]
+                raise
         
         # Run the main function
         logger.info("Starting LightScope core...")
@@ -266,14 +506,25 @@ def load_lightscope_core():
         import traceback
         logger.error(f"Traceback: {traceback.format_exc()}")
         
+        # Re-check Npcap on the next start if it looks like the cause
+        if any(name in str(e).lower() for name in ("npcap", "pcap", "packet.dll")):
+            try:
+                NPCAP_SENTINEL_PATH.unlink()
+            except FileNotFoundError:
+                pass
+            except OSError as unlink_error:
+                logger.warning(f"Could not remove {NPCAP_SENTINEL_PATH}: {unlink_error}")
+        
         # Force cleanup of any remaining processes
         try:
-            import signal
-            import psutil
-            
-            # Get current process and all its children
-            current_process = psutil.Process()
-            children = current_process.children(recursive=True)
+            # The core only starts processes through multiprocessing, so if it
+            # has no live children there is nothing to clean up and the
+            # process table walk below can be skipped
+            if multiprocessing.active_children():
+                # Get all children of this process, walking the process table once
+                children = psutil.Process().children(recursive=True)
+            else:
+                children = []
             
             if children:
                 logger.warning(f"Cleaning up {len(children)} child processes...")
@@ -283,14 +534,11 @@ def load_lightscope_core():
                     except psutil.NoSuchProcess:
                         pass
                 
-                # Wait for children to terminate
-                psutil.wait_procs(children, timeout=5)
-                
-                # Force kill any remaining children
-                for child in children:
+                # Wait for children to terminate, then force kill the rest
+                _, alive = psutil.wait_procs(children, timeout=5)
+                for child in alive:
                     try:
-                        if child.is_running():
-                            child.kill()
+                        child.kill()
                     except psutil.NoSuchProcess:
                         pass
                         
@@ -299,9 +547,21 @@ def load_lightscope_core():
         
         return False
 
+def npcap_stamp(path):
+    """Identify an Npcap installation by a detected path and its mtime"""
+    return f"{path}|{path.stat().st_mtime_ns}"
+
 def check_npcap_installation():
     """Check if Npcap is installed on Windows"""
     try:
+        # Npcap was already found by an earlier start and is unchanged since
+        try:
+            stamp = NPCAP_SENTINEL_PATH.read_text()
+            if stamp == npcap_stamp(Path(stamp.rpartition("|")[0])):
+                return True
+        except OSError:
+            pass
+        
         # Check for Npcap installation
         npcap_path = Path("C:/Windows/System32/Npcap")
         if not npcap_path.exists():
@@ -317,6 +577,7 @@ def check_npcap_installation():
             for path in alt_paths:
                 if path.exists():
                     found = True
+                    npcap_path = path
                     break
             
             if not found:
@@ -324,6 +585,10 @@ def check_npcap_installation():
                 return False
         
         logger.info("Npcap installation detected")
+        try:
+            NPCAP_SENTINEL_PATH.write_text(npcap_stamp(npcap_path))
+        except OSError as e:
+            logger.warning(f"Could not create {NPCAP_SENTINEL_PATH}: {e}")
         return True
         
     except Exception as e:
@@ -332,10 +597,11 @@ def check_npcap_installation():
 
 def check_admin_privileges():
     """Check if running with administrator privileges"""
+    if _IsUserAnAdmin is None:
+        return False
     try:
-        import ctypes
-        return ctypes.windll.shell32.IsUserAnAdmin()
-    except:
+        return bool(_IsUserAnAdmin())
+    except Exception:
         return False
 
 def main():
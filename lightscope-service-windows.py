@@ -9,16 +9,28 @@ import sys
 import time
 import json
 import logging
+import logging.handlers
 import tempfile
 import subprocess
+import ctypes
 import urllib.request
 import urllib.error
 from pathlib import Path
 import servicemanager
+import win32api
+import win32con
 import win32event
 import win32service
 import win32serviceutil
 
+# shell32.IsUserAnAdmin, resolved and prototyped once (None off Windows)
+try:
+    _IsUserAnAdmin = ctypes.windll.shell32.IsUserAnAdmin
+    _IsUserAnAdmin.argtypes = []
+    _IsUserAnAdmin.restype = ctypes.c_int
+except (AttributeError, OSError):
+    _IsUserAnAdmin = None
+
 # Add the current directory to Python path for imports
 current_dir = Path(__file__).parent
 if str(current_dir) not in sys.path:
@@ -34,23 +46,6 @@ else:
     # If running from root directory, use current directory
     LIGHTSCOPE_HOME = SCRIPT_DIR
 
-# Check for virtual environment and use it if available
-VENV_DIR = LIGHTSCOPE_HOME / "venv"
-if VENV_DIR.exists():
-    VENV_PYTHON = VENV_DIR / "Scripts" / "python.exe"
-    if VENV_PYTHON.exists():
-        # Update sys.path to use virtual environment
-        venv_site_packages = VENV_DIR / "Lib" / "site-packages"
-        if str(venv_site_packages) not in sys.path:
-            sys.path.insert(0, str(venv_site_packages))
-        logger.info(f"Using virtual environment: {VENV_DIR}")
-    else:
-        VENV_PYTHON = None
-        logger.warning("Virtual environment directory found but python.exe missing")
-else:
-    VENV_PYTHON = None
-    logger.info("No virtual environment found, using system Python")
-
 CONFIG_DIR = LIGHTSCOPE_HOME / "config"
 UPDATES_DIR = LIGHTSCOPE_HOME / "updates"
 LOGS_DIR = LIGHTSCOPE_HOME / "logs"
@@ -60,18 +55,52 @@ BIN_DIR = LIGHTSCOPE_HOME / "bin"
 if not BIN_DIR.exists():
     BIN_DIR = LIGHTSCOPE_HOME
 
+# Created once all directories exist, so later starts skip the mkdir calls
+DIRS_MARKER_PATH = LIGHTSCOPE_HOME / ".dirs_ok"
+
+# Locations searched for the runner script, resolved once at import;
+# RUNNER_PATH is None if it was not found
+RUNNER_SEARCH_PATHS = (
+    BIN_DIR / "lightscope-runner-windows.py",
+    LIGHTSCOPE_HOME / "lightscope-runner-windows.py",
+    SCRIPT_DIR / "lightscope-runner-windows.py",
+)
+RUNNER_PATH = next((path for path in RUNNER_SEARCH_PATHS if path.exists()), None)
+
 # Setup logging
 LOGS_DIR.mkdir(parents=True, exist_ok=True)
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
     handlers=[
-        logging.FileHandler(LOGS_DIR / "lightscope-service.log"),
+        logging.handlers.RotatingFileHandler(
+            LOGS_DIR / "lightscope-service.log",
+            maxBytes=4 * 1024 * 1024,
+            backupCount=4,
+            delay=True
+        ),
         logging.StreamHandler()
     ]
 )
 logger = logging.getLogger("lightscope-service")
 
+# Check for virtual environment and use it if available
+VENV_DIR = LIGHTSCOPE_HOME / "venv"
+if VENV_DIR.exists():
+    VENV_PYTHON = VENV_DIR / "Scripts" / "python.exe"
+    if VENV_PYTHON.exists():
+        # Update sys.path to use virtual environment
+        venv_site_packages = VENV_DIR / "Lib" / "site-packages"
+        if str(venv_site_packages) not in sys.path:
+            sys.path.insert(0, str(venv_site_packages))
+        logger.info(f"Using virtual environment: {VENV_DIR}")
+    else:
+        VENV_PYTHON = None
+        logger.warning("Virtual environment directory found but python.exe missing")
+else:
+    VENV_PYTHON = None
+    logger.info("No virtual environment found, using system Python")
+
 
 class LightScopeService(win32serviceutil.ServiceFramework):
     """Windows Service for LightScope"""
@@ -106,6 +135,8 @@ class LightScopeService(win32serviceutil.ServiceFramework):
         
     def SvcDoRun(self):
         """Main service execution"""
+        global RUNNER_PATH
+        
         logger.info("LightScope Service starting...")
         servicemanager.LogMsg(
             servicemanager.EVENTLOG_INFORMATION_TYPE,
@@ -120,49 +151,47 @@ class LightScopeService(win32serviceutil.ServiceFramework):
         consecutive_failures = 0
         max_consecutive_failures = 3
         
+        # Use virtual environment Python if available, otherwise use current Python
+        python_executable = str(VENV_PYTHON) if VENV_PYTHON else sys.executable
+        logger.info(f"Using Python executable: {python_executable}")
+        
         while self.is_alive:
             try:
-                # Start the runner process - try multiple locations
-                possible_runner_paths = [
-                    BIN_DIR / "lightscope-runner-windows.py",
-                    LIGHTSCOPE_HOME / "lightscope-runner-windows.py",
-                    SCRIPT_DIR / "lightscope-runner-windows.py",
-                ]
-                
-                runner_script = None
-                for path in possible_runner_paths:
-                    if path.exists():
-                        runner_script = path
-                        break
+                # Start the runner process, searching for it again only if it
+                # was missing at import
+                if RUNNER_PATH is None:
+                    RUNNER_PATH = next((path for path in RUNNER_SEARCH_PATHS if path.exists()), None)
+                runner_script = RUNNER_PATH
                 
                 if not runner_script:
                     logger.error(f"Runner script not found! Searched in:")
-                    for path in possible_runner_paths:
+                    for path in RUNNER_SEARCH_PATHS:
                         logger.error(f"  - {path}")
                     time.sleep(30)
                     continue
                 
                 logger.info("Starting LightScope runner...")
                 
-                # Use virtual environment Python if available, otherwise use current Python
-                python_executable = str(VENV_PYTHON) if VENV_PYTHON else sys.executable
-                logger.info(f"Using Python executable: {python_executable}")
-                
+                # The service has no console; don't allocate one for the runner
                 self.runner_process = subprocess.Popen([
                     python_executable, str(runner_script)
-                ], cwd=str(LIGHTSCOPE_HOME))
+                ], cwd=str(LIGHTSCOPE_HOME), close_fds=True, creationflags=subprocess.CREATE_NO_WINDOW)
                 
-                # Wait for process to finish or service to stop
-                while self.is_alive and self.runner_process.poll() is None:
-                    # Check every 5 seconds
-                    if win32event.WaitForSingleObject(self.hWaitStop, 5000) == win32event.WAIT_OBJECT_0:
-                        break
+                # Wait for process to finish or service to stop, blocking on
+                # both handles at once instead of polling
+                process_handle = win32api.OpenProcess(win32con.SYNCHRONIZE, False, self.runner_process.pid)
+                try:
+                    wait_result = win32event.WaitForMultipleObjects(
+                        [self.hWaitStop, process_handle], False, win32event.INFINITE
+                    )
+                finally:
+                    win32api.CloseHandle(process_handle)
                 
-                if not self.is_alive:
+                if not self.is_alive or wait_result == win32event.WAIT_OBJECT_0:
                     break
                 
                 # Process exited
-                exit_code = self.runner_process.returncode
+                exit_code = self.runner_process.wait()
                 if exit_code == 0:
                     logger.info("LightScope runner exited normally")
                     consecutive_failures = 0
@@ -201,16 +230,18 @@ class LightScopeService(win32serviceutil.ServiceFramework):
     
     def ensure_directories(self):
         """Ensure all required directories exist"""
+        if DIRS_MARKER_PATH.exists():
+            return
         for directory in [CONFIG_DIR, UPDATES_DIR, LOGS_DIR, BIN_DIR]:
             directory.mkdir(parents=True, exist_ok=True)
+        DIRS_MARKER_PATH.touch()
 
 
 def install_service():
     """Install the Windows service"""
     try:
         # Check if running as administrator
-        import ctypes
-        if not ctypes.windll.shell32.IsUserAnAdmin():
+        if _IsUserAnAdmin is None or not _IsUserAnAdmin():
             print("Error: Administrator privileges required to install service")
             print("Please run this script as Administrator")
             return False
@@ -230,8 +261,7 @@ def uninstall_service():
     """Uninstall the Windows service"""
     try:
         # Check if running as administrator
-        import ctypes
-        if not ctypes.windll.shell32.IsUserAnAdmin():
+        if _IsUserAnAdmin is None or not _IsUserAnAdmin():
             print("Error: Administrator privileges required to uninstall service")
             print("Please run this script as Administrator")
             return False
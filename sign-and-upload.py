@@ -6,13 +6,55 @@ This script signs the lightscope_core.py file and prepares it for secure distrib
 
 import os
 import sys
+import atexit
+import fnmatch
+import glob
+import gzip
+import shutil
+import subprocess
+import tarfile
+import tempfile
+import zipfile
 import json
 import hashlib
+import importlib.util
+import re
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from cryptography.hazmat.primitives import hashes, serialization
 from cryptography.hazmat.primitives.asymmetric import rsa, padding
+from cryptography.hazmat.primitives.asymmetric.utils import Prehashed
+from cryptography.exceptions import InvalidSignature
 import argparse
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+HASH_CHUNK_SIZE = 1 << 20  # 1 MiB
+TAR_BUFSIZE = 1 << 20  # tar stream block size handed to the compressor
+
+# Pristine SHA256 object shared by every file hash; copying it skips the
+# digest lookup OpenSSL 3 does for each new hashlib.sha256()
+_SHA256_TEMPLATE = hashlib.sha256()
+
+# Matches the ls_version = "x.x.x" line near the top of lightscope_core.py
+_VERSION_RE = re.compile(r'ls_version\s*=\s*["\']([^"\']+)["\']')
+VERSION_HEAD_SIZE = 64 * 1024
+
+# PSS salt lengths selectable with --salt-length. Deployed runners verify
+# with MAX_LENGTH, so "digest" (32 bytes, as RFC 8017 recommends) must only
+# be used once every client verifies with an auto-detected salt length.
+PSS_SALT_LENGTHS = {
+    "max": padding.PSS.MAX_LENGTH,
+    "digest": hashes.SHA256.digest_size,
+}
+
+# Files that are already compressed, stored as-is in the zip archive
+PRECOMPRESSED_SUFFIXES = {".deb", ".rpm", ".gz", ".xz", ".zst", ".bz2", ".zip"}
+
 def generate_key_pair(private_key_path, public_key_path):
     """Generate a new RSA key pair for signing"""
     print("Generating new RSA key pair...")
@@ -66,28 +108,33 @@ def load_private_key(private_key_path):
         print(f"Error loading private key: {e}")
         return None
 
-def sign_file(file_path, private_key, signature_path):
-    """Sign a file using the private key"""
+def sign_file(file_path, private_key, signature_path, digest=None, salt_length=padding.PSS.MAX_LENGTH,
+              display_path=None):
+    """Sign a file using the private key
+    
+    digest is the file's SHA256 digest (bytes) if it was already computed;
+    otherwise the file is hashed here. display_path is the path reported
+    for the signature, if it is written somewhere other than its final place.
+    """
     try:
-        # Read the file to be signed
-        with open(file_path, 'rb') as f:
-            file_data = f.read()
+        if digest is None:
+            digest = get_file_digest(file_path).digest()
         
-        # Create signature
+        # Create signature over the digest; identical to signing the file data
         signature = private_key.sign(
-            file_data,
+            digest,
             padding.PSS(
                 mgf=padding.MGF1(hashes.SHA256()),
-                salt_length=padding.PSS.MAX_LENGTH
+                salt_length=salt_length
             ),
-            hashes.SHA256()
+            Prehashed(hashes.SHA256())
         )
         
         # Save signature
         with open(signature_path, 'wb') as f:
             f.write(signature)
         
-        print(f"File signed successfully: {signature_path}")
+        print(f"File signed successfully: {display_path or signature_path}")
         return True
         
     except Exception as e:
@@ -101,23 +148,33 @@ def verify_signature(file_path, signature_path, public_key_path):
         with open(public_key_path, 'rb') as f:
             public_key = serialization.load_pem_public_key(f.read())
         
-        # Read file and signature
-        with open(file_path, 'rb') as f:
-            file_data = f.read()
+        # Hash the file in chunks instead of reading it whole, and read the signature
+        digest = get_file_digest(file_path).digest()
         
         with open(signature_path, 'rb') as f:
             signature = f.read()
         
-        # Verify signature
-        public_key.verify(
-            signature,
-            file_data,
-            padding.PSS(
-                mgf=padding.MGF1(hashes.SHA256()),
-                salt_length=padding.PSS.MAX_LENGTH
-            ),
-            hashes.SHA256()
-        )
+        # Verify signature over the digest, accepting either salt length
+        # sign_file may have used
+        if hasattr(padding.PSS, "AUTO"):
+            salt_lengths = [padding.PSS.AUTO]
+        else:
+            salt_lengths = list(PSS_SALT_LENGTHS.values())
+        for i, salt_length in enumerate(salt_lengths):
+            try:
+                public_key.verify(
+                    signature,
+                    digest,
+                    padding.PSS(
+                        mgf=padding.MGF1(hashes.SHA256()),
+                        salt_length=salt_length
+                    ),
+                    Prehashed(hashes.SHA256())
+                )
+                break
+            except InvalidSignature:
+                if i == len(salt_lengths) - 1:
+                    raise
         
         print("Signature verification successful!")
         return True
@@ -126,30 +183,77 @@ def verify_signature(file_path, signature_path, public_key_path):
         print(f"Signature verification failed: {e}")
         return False
 
-def get_file_hash(file_path):
-    """Get SHA256 hash of a file"""
-    sha256_hash = hashlib.sha256()
+def get_file_digest(file_path):
+    """Get a SHA256 hash object fed with the contents of a file"""
     with open(file_path, "rb") as f:
-        for byte_block in iter(lambda: f.read(4096), b""):
+        # Python 3.11+ hashes the file in C without a Python-level loop
+        if hasattr(hashlib, "file_digest"):
+            return hashlib.file_digest(f, _SHA256_TEMPLATE.copy)
+        sha256_hash = _SHA256_TEMPLATE.copy()
+        for byte_block in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
             sha256_hash.update(byte_block)
-    return sha256_hash.hexdigest()
+    return sha256_hash
+
+def get_file_hash(file_path):
+    """Get SHA256 hash of a file"""
+    return get_file_digest(file_path).hexdigest()
+
+def copy_file(src, dst):
+    """Copy src to dst with an in-kernel copy_file_range where possible
+    
+    On copy-on-write filesystems the copy is reflinked; otherwise, or if the
+    kernel does not support it, this falls back to a plain copy. The result
+    is always an independent file.
+    """
+    if hasattr(os, "copy_file_range"):
+        try:
+            with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+                remaining = os.fstat(fsrc.fileno()).st_size
+                while remaining > 0:
+                    copied = os.copy_file_range(fsrc.fileno(), fdst.fileno(), remaining)
+                    if copied == 0:
+                        break
+                    remaining -= copied
+            if remaining == 0:
+                return
+        except OSError:
+            pass
+    shutil.copyfile(src, dst)
+
+def link_or_copy(src, dst):
+    """Hard link src to dst when they share a filesystem, otherwise copy it
+    
+    Only for files that are not signed or hashed here: a later edit of src
+    shows through the link.
+    """
+    try:
+        os.link(src, dst)
+    except OSError:
+        copy_file(src, dst)
 
 def extract_version(file_path):
     """Extract version from lightscope_core.py"""
     try:
         with open(file_path, 'r') as f:
-            content = f.read()
-            import re
-            match = re.search(r'ls_version\s*=\s*["\']([^"\']+)["\']', content)
+            # The version sits near the top of the file; only read on past
+            # the first VERSION_HEAD_SIZE characters if it is not there
+            content = f.read(VERSION_HEAD_SIZE)
+            match = _VERSION_RE.search(content)
+            if not match:
+                match = _VERSION_RE.search(content + f.read())
             if match:
                 return match.group(1)
     except Exception as e:
         print(f"Error extracting version: {e}")
     return None
 
-def create_version_info(file_path, version):
-    """Create version information JSON"""
-    file_hash = get_file_hash(file_path)
+def create_version_info(file_path, version, file_hash=None):
+    """Create version information JSON
+    
+    file_hash is the file's SHA256 hex digest if it was already computed.
+    """
+    if file_hash is None:
+        file_hash = get_file_hash(file_path)
     
     version_info = {
         "version": version,
@@ -165,38 +269,113 @@ def create_version_info(file_path, version):
     
     return version_info
 
-def create_archives(upload_dir, version):
-    """Create tar.gz and zip archives of the upload directory"""
-    import tarfile
-    import zipfile
-    import shutil
-    
-    upload_path = Path(upload_dir)
-    base_name = f"lightscope_v{version}_upload"
+def create_manifest(version, file_hashes):
+    """Create a release manifest from a {filename: SHA256 hex} map"""
+    manifest = {
+        "version": version,
+        "files": dict(file_hashes)
+    }
     
-    # Create tar.gz archive
-    tar_path = Path(f"{base_name}.tar.gz")
-    with tarfile.open(tar_path, "w:gz") as tar:
-        tar.add(upload_path, arcname=upload_path.name)
+    return manifest
+
+def write_json(data, path):
+    """Write data as indented JSON, with orjson when it is installed"""
+    if ORJSON_AVAILABLE:
+        with open(path, 'wb') as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+    else:
+        with open(path, 'w') as f:
+            json.dump(data, f, indent=2)
+
+def list_archive_entries(upload_path):
+    """Walk the upload directory once for both archives
+    
+    Returns (path, arcname, is_dir) tuples, the directory itself first.
+    """
+    entries = [(upload_path, Path(upload_path.name), True)]
+    for path in sorted(upload_path.rglob('*')):
+        arcname = Path(upload_path.name) / path.relative_to(upload_path)
+        entries.append((path, arcname, path.is_dir()))
+    return entries
+
+def create_tar_archive(entries, tar_path):
+    """Create a tar.gz archive of the upload directory from its entries
+    
+    Compresses with pigz on all cores when it is installed, otherwise with
+    Python's single-threaded gzip.
+    """
+    # The tar is written as a stream in TAR_BUFSIZE blocks, so the compressor
+    # gets large buffers instead of one 10 KiB tar record at a time.
+    # gzip level 6 is much faster than the default 9 for a negligible size difference
+    pigz = shutil.which("pigz")
+    if pigz:
+        with open(tar_path, 'wb') as out:
+            proc = subprocess.Popen([pigz, "-6"], stdin=subprocess.PIPE, stdout=out)
+            try:
+                with tarfile.open(fileobj=proc.stdin, mode="w|", bufsize=TAR_BUFSIZE) as tar:
+                    for path, arcname, _ in entries:
+                        tar.add(path, arcname=str(arcname), recursive=False)
+            finally:
+                proc.stdin.close()
+                returncode = proc.wait()
+        if returncode != 0:
+            raise RuntimeError(f"pigz failed with exit code {returncode}")
+    else:
+        with gzip.open(tar_path, 'wb', compresslevel=6) as gz:
+            with tarfile.open(fileobj=gz, mode="w|", bufsize=TAR_BUFSIZE) as tar:
+                for path, arcname, _ in entries:
+                    tar.add(path, arcname=str(arcname), recursive=False)
     print(f"Created tar.gz archive: {tar_path}")
-    
-    # Create zip archive
-    zip_path = Path(f"{base_name}.zip")
-    with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-        for file_path in upload_path.rglob('*'):
-            if file_path.is_file():
-                # Create relative path for archive
-                arcname = Path(upload_path.name) / file_path.relative_to(upload_path)
+
+def create_zip_archive(entries, zip_path):
+    """Create a zip archive of the upload directory from its entries"""
+    # Fastest deflate level; packages are already compressed, so they are
+    # stored rather than deflated again
+    with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED, compresslevel=1) as zipf:
+        for file_path, arcname, is_dir in entries:
+            if is_dir:
+                continue
+            if file_path.suffix in PRECOMPRESSED_SUFFIXES:
+                zipf.write(file_path, arcname, compress_type=zipfile.ZIP_STORED)
+            else:
                 zipf.write(file_path, arcname)
     print(f"Created zip archive: {zip_path}")
 
-def upload_to_server(version):
-    """Upload the tar.gz archive to the server via SCP"""
-    import subprocess
-    
-    tar_file = f"lightscope_v{version}_upload.tar.gz"
-    
-    # Prompt for server credentials
+def create_archives(upload_dir, version):
+    """Create tar.gz and zip archives of the upload directory"""
+    upload_path = Path(upload_dir)
+    base_name = f"lightscope_v{version}_upload"
+    entries = list_archive_entries(upload_path)
+    
+    # Build both archives at once; zlib releases the GIL while compressing
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        futures = [
+            executor.submit(create_tar_archive, entries, Path(f"{base_name}.tar.gz")),
+            executor.submit(create_zip_archive, entries, Path(f"{base_name}.zip")),
+        ]
+        for future in futures:
+            future.result()
+
+def build_stamp(args, version):
+    """Describe the inputs of a build, to detect reruns where nothing changed"""
+    stamp = {
+        "version": version,
+        "core_sha256": get_file_hash(args.core_file),
+        "salt_length": args.salt_length,
+    }
+    # The other inputs are only stat'ed; they are copied, not transformed
+    other_inputs = [args.public_key, f"lightscope_{version}_amd64.deb"]
+    other_inputs += sorted(glob.glob(f"lightscope-{version}-*.noarch.rpm"))
+    for path in other_inputs:
+        try:
+            file_stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        stamp[path] = [file_stat.st_size, file_stat.st_mtime_ns]
+    return stamp
+
+def prompt_server_config():
+    """Ask for the upload destination; returns (remote_host, remote_path)"""
     print("\n📤 Server Upload Configuration")
     print("=" * 40)
     server_user = input("Enter server username (e.g., user): ").strip()
@@ -207,29 +386,110 @@ def upload_to_server(version):
     if remote_path and not remote_path.endswith('/'):
         remote_path += '/'
     
-    remote_host = f"{server_user}@{server_host}"
+    return f"{server_user}@{server_host}", remote_path
+
+def open_ssh_master(remote_host):
+    """Log in to the server once, before building, and keep the connection
+    
+    Returns the control socket path that the upload reuses, or None if ssh
+    is not installed. Exits if the login fails, so a wrong host or password
+    is caught before the build rather than after it.
+    """
+    if not shutil.which("ssh"):
+        return None
     
-    print(f"\nUploading {tar_file} to {remote_host}:{remote_path}")
+    socket_dir = tempfile.mkdtemp(prefix="lightscope_ssh_")
+    control_path = os.path.join(socket_dir, "master")
+    print(f"\nConnecting to {remote_host}...")
     print("Please enter your password when prompted...")
+    # -f backgrounds the master once it has authenticated; it exits on its
+    # own if left idle, and is closed explicitly when this script exits
+    result = subprocess.run(["ssh", "-M", "-S", control_path, "-o", "ControlPersist=300",
+                             "-N", "-f", remote_host])
+    if result.returncode != 0:
+        shutil.rmtree(socket_dir, ignore_errors=True)
+        print(f"❌ Could not connect to {remote_host}")
+        print("Use --no-upload to build without uploading")
+        sys.exit(1)
+    
+    def close_master():
+        subprocess.run(["ssh", "-S", control_path, "-O", "exit", remote_host],
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        shutil.rmtree(socket_dir, ignore_errors=True)
+    atexit.register(close_master)
+    return control_path
+
+def upload_with_sftp(tar_file, remote_host, remote_path):
+    """Upload over SFTP with paramiko, for systems without rsync or scp
+    
+    The archive is streamed from disk in chunks, never read whole.
+    """
+    import getpass
+    import paramiko
+    
+    server_user, _, server_host = remote_host.rpartition("@")
+    client = paramiko.SSHClient()
+    client.load_system_host_keys()
+    try:
+        try:
+            client.connect(server_host, username=server_user)
+        except paramiko.AuthenticationException:
+            password = getpass.getpass(f"{remote_host}'s password: ")
+            client.connect(server_host, username=server_user, password=password,
+                           allow_agent=False, look_for_keys=False)
+        with client.open_sftp() as sftp:
+            sftp.put(tar_file, remote_path + os.path.basename(tar_file))
+    finally:
+        client.close()
+
+def upload_to_server(version, remote_host, remote_path, control_path=None):
+    """Upload the tar.gz archive to the server via rsync, or SCP without it,
+    or paramiko's SFTP when neither is installed
+    
+    control_path is the socket of an SSH master connection from
+    open_ssh_master(), reused instead of logging in again.
+    """
+    tar_file = f"lightscope_v{version}_upload.tar.gz"
+    
+    print(f"\nUploading {tar_file} to {remote_host}:{remote_path}")
+    if control_path is None:
+        print("Please enter your password when prompted...")
+    ssh_options = ["-o", f"ControlPath={control_path}"] if control_path else []
+    
+    # rsync over SSH keeps partial transfers so an interrupted upload
+    # resumes, and only sends changed blocks of an existing remote file;
+    # both tools allow the interactive password prompt
+    destination = f"{remote_host}:{remote_path}"
+    if shutil.which("rsync"):
+        ssh_command = " ".join(["ssh"] + ssh_options)
+        command = ["rsync", "-av", "--partial", "--inplace", "-e", ssh_command, tar_file, destination]
+    elif shutil.which("scp") or importlib.util.find_spec("paramiko") is None:
+        # -C compresses on the SSH layer
+        command = ["scp", "-C"] + ssh_options + [tar_file, destination]
+    else:
+        command = None
     
     try:
-        # Use scp to upload the file, allowing interactive password prompt
-        result = subprocess.run([
-            "scp", 
-            tar_file,
-            f"{remote_host}:{remote_path}"
-        ], check=True)
+        if command is None:
+            upload_with_sftp(tar_file, remote_host, remote_path)
+        else:
+            result = subprocess.run(command, check=True)
         
         print(f"✅ Successfully uploaded {tar_file} to server!")
         
     except subprocess.CalledProcessError as e:
         print(f"❌ Failed to upload file: {e}")
         print("You can manually upload later using:")
-        print(f"scp {tar_file} {remote_host}:{remote_path}")
-    except FileNotFoundError:
-        print("❌ scp command not found. Please install OpenSSH client.")
+        print(f"scp -C {tar_file} {remote_host}:{remote_path}")
+    except Exception as e:
+        # FileNotFoundError here is the missing scp binary, or a missing
+        # remote directory on the SFTP path
+        if command is not None and isinstance(e, FileNotFoundError):
+            print(f"❌ {command[0]} command not found. Please install OpenSSH client.")
+        else:
+            print(f"❌ Failed to upload file: {e}")
         print("You can manually upload later using:")
-        print(f"scp {tar_file} {remote_host}:{remote_path}")
+        print(f"scp -C {tar_file} {remote_host}:{remote_path}")
 
 def main():
     parser = argparse.ArgumentParser(description="Sign LightScope core files")
@@ -247,18 +507,45 @@ def main():
                        help="Verify signature after signing")
     parser.add_argument("--no-upload", action="store_true",
                        help="Skip uploading to server via SCP")
+    parser.add_argument("--force", action="store_true",
+                       help="Rebuild even if the inputs are unchanged since the last run")
+    parser.add_argument("--salt-length", choices=sorted(PSS_SALT_LENGTHS), default="max",
+                       help="RSA-PSS salt length; 'digest' needs clients that auto-detect it (default: max)")
     
     args = parser.parse_args()
     
-    # Create output directory (remove and recreate to ensure clean state)
+    # Skip signing and archiving if nothing changed since the last run; the
+    # existing archive is still uploaded, as the last upload may not have been
     output_dir = Path(args.output_dir)
-    if output_dir.exists():
-        import shutil
-        shutil.rmtree(output_dir)
-    output_dir.mkdir(exist_ok=True)
+    stamp_path = output_dir.parent / f".{output_dir.name}.stamp"
+    stamp = None
+    if not args.generate_keys and Path(args.core_file).exists():
+        version = extract_version(args.core_file)
+        if version:
+            stamp = build_stamp(args, version)
+            base_name = f"lightscope_v{version}_upload"
+            if not args.force and output_dir.exists() and Path(f"{base_name}.tar.gz").exists() and Path(f"{base_name}.zip").exists():
+                try:
+                    with open(stamp_path, 'r') as f:
+                        unchanged = json.load(f) == stamp
+                except (OSError, ValueError):
+                    unchanged = False
+                if unchanged:
+                    print(f"LightScope v{version} is unchanged since the last run, skipping signing and archiving")
+                    print("Use --force to sign and archive again")
+                    if not args.no_upload:
+                        remote_host, remote_path = prompt_server_config()
+                        control_path = open_ssh_master(remote_host)
+                        upload_to_server(version, remote_host, remote_path, control_path)
+                    else:
+                        print("\n⏭️  Skipping server upload (--no-upload specified)")
+                    return
     
     # Generate keys if requested
     if args.generate_keys:
+        if args.core_file != parser.get_default("core_file"):
+            print(f"Warning: --generate-keys only creates a key pair; {args.core_file} is not signed")
+            print("Run again without --generate-keys to sign it")
         generate_key_pair(args.private_key, args.public_key)
         return
     
@@ -284,51 +571,85 @@ def main():
         print("Error: Could not extract version from core file")
         sys.exit(1)
     
+    # Ask where to upload and log in now, so a typo does not cost a rebuild
+    if not args.no_upload:
+        remote_host, remote_path = prompt_server_config()
+        control_path = open_ssh_master(remote_host)
+    
     print(f"Signing LightScope v{version}...")
     
+    # Build into a fresh directory next to the output directory and swap it
+    # in once complete, so a failed run never leaves a half-written upload/
+    build_dir = Path(tempfile.mkdtemp(prefix="lightscope_upload_", dir=output_dir.parent))
+    atexit.register(shutil.rmtree, build_dir, ignore_errors=True)
+    os.chmod(build_dir, 0o755)  # mkdtemp creates it 0700; rsync -a would carry that over
+    
     # Copy core file to output directory
-    import shutil
-    output_core = output_dir / "lightscope_core.py"
-    shutil.copy2(args.core_file, output_core)
+    output_core = build_dir / "lightscope_core.py"
+    copy_file(args.core_file, output_core)
+    
+    # Hash the copy that is signed, not the working copy hashed for the build
+    # stamp before the prompts; the digest is used for the signature, the
+    # manifest and the version info
+    core_hash = get_file_hash(output_core)
+    if stamp is not None:
+        stamp["core_sha256"] = core_hash
     
     # Sign the file
-    signature_path = output_dir / "lightscope_core.py.sig"
-    if not sign_file(output_core, private_key, signature_path):
+    signature_path = build_dir / "lightscope_core.py.sig"
+    salt_length = PSS_SALT_LENGTHS[args.salt_length]
+    if not sign_file(output_core, private_key, signature_path, bytes.fromhex(core_hash), salt_length,
+                     display_path=output_dir / signature_path.name):
+        sys.exit(1)
+    
+    # Create and sign the release manifest, so clients can verify every
+    # listed file with a single signature check
+    manifest = create_manifest(version, {"lightscope_core.py": core_hash})
+    manifest_path = build_dir / "manifest.json"
+    write_json(manifest, manifest_path)
+    if not sign_file(manifest_path, private_key, build_dir / "manifest.json.sig", salt_length=salt_length,
+                     display_path=output_dir / "manifest.json.sig"):
         sys.exit(1)
     
     # Copy public key to output directory
-    shutil.copy2(args.public_key, output_dir / "lightscope-public.pem")
+    copy_file(args.public_key, build_dir / "lightscope-public.pem")
+    
+    # Find the .deb and .rpm packages in one pass over the current directory
+    deb_name = f"lightscope_{version}_amd64.deb"
+    rpm_pattern = f"lightscope-{version}-*.noarch.rpm"
+    deb_file = None
+    rpm_files = []
+    with os.scandir(".") as entries:
+        for entry in entries:
+            if not entry.is_file():
+                continue
+            if entry.name == deb_name:
+                deb_file = Path(entry.name)
+            elif fnmatch.fnmatch(entry.name, rpm_pattern):
+                rpm_files.append(entry.name)
     
     # Copy .deb package to output directory if it exists
-    deb_file = Path(f"lightscope_{version}_amd64.deb")
-    if deb_file.exists():
-        deb_output = output_dir / deb_file.name
-        shutil.copy2(deb_file, deb_output)
-        print(f"Added .deb package: {deb_output}")
+    if deb_file is not None:
+        link_or_copy(deb_file, build_dir / deb_file.name)
+        print(f"Added .deb package: {output_dir / deb_file.name}")
     else:
-        print(f"Warning: .deb package not found: {deb_file}")
-    
-    # Copy .rpm package to output directory if it exists (look for any matching pattern)
-    import glob
-    rpm_pattern = f"lightscope-{version}-*.noarch.rpm"
-    rpm_files = glob.glob(rpm_pattern)
+        print(f"Warning: .deb package not found: {deb_name}")
     
+    # Copy .rpm package to output directory if it exists
     if rpm_files:
         # Use the first matching RPM file (there should only be one)
-        rpm_file = Path(rpm_files[0])
-        rpm_output = output_dir / rpm_file.name
-        shutil.copy2(rpm_file, rpm_output)
-        print(f"Added .rpm package: {rpm_output}")
+        rpm_file = Path(sorted(rpm_files)[0])
+        link_or_copy(rpm_file, build_dir / rpm_file.name)
+        print(f"Added .rpm package: {output_dir / rpm_file.name}")
     else:
         print(f"Warning: .rpm package not found: {rpm_pattern}")
     
     # Create version info
-    version_info = create_version_info(output_core, version)
-    version_file = output_dir / "version"
-    with open(version_file, 'w') as f:
-        json.dump(version_info, f, indent=2)
+    version_info = create_version_info(output_core, version, core_hash)
+    version_file = build_dir / "version"
+    write_json(version_info, version_file)
     
-    print(f"Version info created: {version_file}")
+    print(f"Version info created: {output_dir / version_file.name}")
     
     # Verify signature if requested
     if args.verify:
@@ -336,42 +657,48 @@ def main():
         if not verify_signature(output_core, signature_path, args.public_key):
             sys.exit(1)
     
+    # Replace the previous output directory with the finished build
+    if output_dir.exists():
+        shutil.rmtree(output_dir)
+    os.replace(build_dir, output_dir)
+    
     # Create archives
     print("Creating distribution archives...")
     create_archives(output_dir, version)
     
+    # Record the inputs of this build so an unchanged rerun can be skipped
+    if stamp is not None:
+        with open(stamp_path, 'w') as f:
+            json.dump(stamp, f)
+    
     print("\nSigning complete!")
     print(f"Files ready for distribution in: {output_dir}")
     print("Files created:")
     print(f"  - lightscope_core.py (signed file)")
     print(f"  - lightscope_core.py.sig (signature)")
+    print(f"  - manifest.json (signed release manifest)")
+    print(f"  - manifest.json.sig (manifest signature)")
     print(f"  - lightscope-public.pem (public key)")
     print(f"  - version (version information)")
     
-    # List package files if they exist
-    deb_file = output_dir / f"lightscope_{version}_amd64.deb"
-    if deb_file.exists():
+    # List the package files copied above
+    if deb_file is not None:
         print(f"  - {deb_file.name} (Debian package)")
-    
-    # Look for any RPM files in output directory
-    import glob
-    rpm_files = glob.glob(str(output_dir / f"lightscope-{version}-*.noarch.rpm"))
-    for rpm_file in rpm_files:
-        rpm_name = Path(rpm_file).name
-        print(f"  - {rpm_name} (RPM package)")
+    if rpm_files:
+        print(f"  - {rpm_file.name} (RPM package)")
     print("\nArchives created:")
     print(f"  - lightscope_v{version}_upload.tar.gz")
     print(f"  - lightscope_v{version}_upload.zip")
     
     # Upload to server via SCP (unless disabled)
     if not args.no_upload:
-        upload_to_server(version)
+        upload_to_server(version, remote_host, remote_path, control_path)
     else:
         print("\n⏭️  Skipping server upload (--no-upload specified)")
     
     print("\nNext steps:")
     print("1. All files now go to: https://thelightscope.com/latest/")
-    print("2. Upload lightscope_core.py and lightscope_core.py.sig")
+    print("2. Upload lightscope_core.py, lightscope_core.py.sig, manifest.json and manifest.json.sig")
     print("3. Upload version as 'version' endpoint")
     print("4. Upload public key as 'public-key' endpoint")
 